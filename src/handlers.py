@@ -0,0 +1,462 @@
+import copy
+import itertools
+import locale
+import logging
+import mmap
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging.handlers import QueueHandler, RotatingFileHandler
+from pathlib import Path
+
+
+def _open_append_fd(file_path: str | Path, mode: str = "a") -> int:
+    """
+    Open a log file for appending at the OS level and return its file descriptor.
+    :param file_path: Path of the log file.
+    :param mode: Mode to open the log file ('a' for append, 'w' for write).
+    :return: A raw file descriptor opened with O_APPEND.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0)
+    if "w" in mode:
+        flags |= os.O_TRUNC
+    return os.open(file_path, flags, 0o644)
+
+
+def _write_all(fd: int, data: bytes | bytearray) -> None:
+    """Write the whole buffer to the file descriptor, retrying on partial writes."""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _snapshot_record(record: logging.LogRecord) -> logging.LogRecord:
+    """
+    Copy a record with its message merged with its arguments, so later changes to the arguments are not logged.
+    The exception information is kept, so the formatters lay out the traceback as for a record formatted right away.
+    :param record: The record to copy.
+    :return: The copied record.
+    """
+    record = copy.copy(record)
+    record.msg = record.getMessage()
+    record.args = None
+    return record
+
+
+class InProcessQueueHandler(QueueHandler):
+    """
+    A queue handler for a queue consumed in the same process. Unlike QueueHandler, it does not format the record before queuing it
+    (which would merge the traceback into the message); it only snapshots the message.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return _snapshot_record(record)
+
+
+class AppendFileHandler(logging.Handler):
+    """
+    A file handler that writes each record with a single os.write call on a file descriptor opened with O_APPEND,
+    bypassing the buffering and locking layers of Python file objects. Appends of a single write are atomic on POSIX.
+    """
+
+    def __init__(self, filename: str | Path, mode: str = "a", encoding: str = "utf-8", sync: bool = False):
+        """
+        Initialize the AppendFileHandler.
+        :param filename: Path of the log file.
+        :param mode: Mode to open the log file ('a' for append, 'w' for write).
+        :param encoding: Encoding used to write the log records.
+        :param sync: Whether to call fsync after every record.
+        """
+        super().__init__()
+        self.baseFilename = os.path.abspath(os.fspath(filename))
+        self.mode = mode
+        self.encoding = encoding
+        self.terminator = "\n"
+        self.sync = sync
+        self._fd: None | int = _open_append_fd(self.baseFilename, mode)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            _write_all(self._fd, (self.format(record) + self.terminator).encode(self.encoding))
+            if self.sync:
+                os.fsync(self._fd)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        """Close the file."""
+        self.acquire()
+        try:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+        finally:
+            self.release()
+            super().close()
+
+
+class MmapFileHandler(logging.Handler):
+    """
+    A file handler that copies each record into a memory mapping of the log file instead of calling write, leaving the page cache to absorb the writes.
+    Only a window of the file starting near its end is mapped; the file is grown in chunks of `chunk_size` bytes, the window is moved
+    forward when it is full, and the file is truncated to the written size when the handler is closed.
+    Only supported on Linux, and only safe when a single process writes the log file. Until the handler is closed the file ends with
+    zero padding; if the process dies without closing the handler, the padding is removed the next time the file is opened for appending.
+    The disk space of each window is reserved with posix_fallocate, so a full disk raises an OSError when the file grows. Writing to the
+    mapping can still kill the process with SIGBUS if the file is truncated by another process, or on file systems that do not keep
+    the reserved blocks (e.g. copy-on-write file systems); such errors cannot be caught and reported by the handler.
+    """
+
+    def __init__(self, filename: str | Path, mode: str = "a", encoding: str = "utf-8", chunk_size: int = 16 << 20):
+        """
+        Initialize the MmapFileHandler.
+        :param filename: Path of the log file.
+        :param mode: Mode to open the log file ('a' for append, 'w' for write).
+        :param encoding: Encoding used to write the log records.
+        :param chunk_size: Number of bytes the file grows by when the mapped window is full. Default is 16 MiB.
+        :raises OSError: If the platform is not Linux.
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError(f"{self.__class__.__name__} is only supported on Linux.")
+        super().__init__()
+        self.baseFilename = os.path.abspath(os.fspath(filename))
+        self.mode = mode
+        self.encoding = encoding
+        self.terminator = "\n"
+        self.chunk_size = chunk_size
+        self._fd: None | int = os.open(self.baseFilename, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC | (os.O_TRUNC if "w" in mode else 0), 0o644)
+        try:
+            self._offset: int = self._strip_zero_padding()
+            self._map_start: int = 0
+            self._map: mmap.mmap = self._map_window(0)
+        except BaseException:
+            os.close(self._fd)
+            self._fd = None
+            raise
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            data = (self.format(record) + self.terminator).encode(self.encoding)
+            if self._offset + len(data) > self._map_start + len(self._map):
+                self._map.close()
+                self._map = self._map_window(len(data))
+            start = self._offset - self._map_start
+            end = start + len(data)
+            self._map[start:end] = data
+            self._offset += len(data)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """Write the mapped pages back to the file."""
+        self.acquire()
+        try:
+            if self._fd is not None:
+                self._map.flush()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        """Unmap the file, truncate it to the written size, and close it."""
+        self.acquire()
+        try:
+            if self._fd is not None:
+                self._map.close()
+                os.ftruncate(self._fd, self._offset)
+                os.close(self._fd)
+                self._fd = None
+        finally:
+            self.release()
+            super().close()
+
+    def _strip_zero_padding(self) -> int:
+        """
+        Truncate the zero padding left at the end of the file by a handler that was not closed.
+        Records always end with the terminator, so trailing null bytes are never log data.
+        :return: The size of the file without the padding.
+        """
+        size = end = os.fstat(self._fd).st_size
+        while size > 0:
+            block = os.pread(self._fd, min(size, 1 << 16), max(size - (1 << 16), 0))
+            data = block.rstrip(b"\0")
+            size -= len(block) - len(data)
+            if data:
+                break
+        if size != end:
+            os.ftruncate(self._fd, size)
+        return size
+
+    def _map_window(self, length: int) -> mmap.mmap:
+        """
+        Grow the file and map a window of it from the allocation-aligned offset at or before the write offset.
+        :param length: Number of bytes that must fit in the window after the write offset, in addition to `chunk_size`.
+        :return: The new mapping.
+        :raises OSError: If the disk space of the window cannot be reserved.
+        """
+        self._map_start = self._offset - self._offset % mmap.ALLOCATIONGRANULARITY
+        size = self._offset - self._map_start + length + self.chunk_size
+        # Allocate the blocks (rather than creating a sparse file with ftruncate), so writing to the mapping cannot fail on a full disk
+        os.posix_fallocate(self._fd, self._map_start, size)
+        return mmap.mmap(self._fd, size, offset=self._map_start)
+
+
+class BatchedFileHandler(logging.Handler):
+    """
+    A file handler that hands records to a background thread, which formats a batch of records and writes it with a single write call.
+    The calling thread only merges the message with its arguments and puts a copy of the record on a queue.
+    A batch is written once it holds `max_batch` records, or `flush_interval` seconds after its first record.
+    """
+
+    def __init__(self, filename: str | Path, mode: str = "a", encoding: str = "utf-8", max_batch: int = 64, flush_interval: float = 0.01):
+        """
+        Initialize the BatchedFileHandler.
+        :param filename: Path of the log file.
+        :param mode: Mode to open the log file ('a' for append, 'w' for write).
+        :param encoding: Encoding used to write the log records.
+        :param max_batch: Maximum number of records coalesced into a single write.
+        :param flush_interval: Maximum time in seconds a record waits for more records before its batch is written.
+        """
+        super().__init__()
+        self.baseFilename = os.path.abspath(os.fspath(filename))
+        self.mode = mode
+        self.encoding = encoding
+        self.terminator = "\n"
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._fd: None | int = _open_append_fd(self.baseFilename, mode)
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_batches, name=f"{self.__class__.__name__}({self.baseFilename})", daemon=True)
+        self._writer.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            # Snapshot the message now; the rest of the formatting is deferred to the writer thread
+            self._queue.put(_snapshot_record(record))
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """Block until all records queued so far have been written."""
+        # Holding the lock keeps close() from queuing the stop sentinel ahead of the flush request
+        self.acquire()
+        try:
+            if self._fd is None or not self._writer.is_alive():
+                return
+            written = threading.Event()
+            self._queue.put(written)
+            written.wait()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        """Write the pending records, stop the background thread, and close the file."""
+        self.acquire()
+        try:
+            if self._fd is not None:
+                if self._writer.is_alive():
+                    self._queue.put(None)
+                    self._writer.join()
+                os.close(self._fd)
+                self._fd = None
+        finally:
+            self.release()
+            super().close()
+
+    def _write_batches(self) -> None:
+        stop = False
+        while not stop:
+            records = []
+            events = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                # A flush or close request ends the batch immediately
+                if item is None:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    events.append(item)
+                    break
+                records.append(item)
+                if len(records) >= self.max_batch:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+            if records:
+                self._write_records(records)
+            for event in events:
+                event.set()
+
+    def _write_records(self, records: list[logging.LogRecord]) -> None:
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format(record) + self.terminator)
+            except Exception:
+                self.handleError(record)
+        try:
+            _write_all(self._fd, "".join(lines).encode(self.encoding))
+        except Exception:
+            if logging.raiseExceptions:
+                traceback.print_exc(file=sys.stderr)
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    A file handler that writes the log file through a large userspace buffer instead of flushing after every record.
+    The buffer is flushed when it is full, when a record at or above `flush_level` is emitted, and when the handler is flushed or closed
+    (the logging module flushes and closes all handlers at interpreter exit).
+    """
+
+    def __init__(self, filename: str | Path, mode: str = "a", encoding: None | str = None, buffer_size: int = 1 << 20, flush_level: int = logging.WARNING):
+        """
+        Initialize the BufferedFileHandler.
+        :param filename: Path of the log file.
+        :param mode: Mode to open the log file ('a' for append, 'w' for write).
+        :param encoding: Encoding used to write the log records.
+        :param buffer_size: Size of the write buffer in bytes. Default is 1 MiB.
+        :param flush_level: Records at or above this level are flushed to the file immediately. Default is WARNING.
+        """
+        self.buffer_size = buffer_size
+        self.flush_level = flush_level
+        super().__init__(filename=filename, mode=mode, encoding=encoding)
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size, encoding=self.encoding, errors=self.errors)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Like FileHandler, do not reopen (and truncate) a file opened in 'w' mode once the handler is closed
+        if self.stream is None:
+            if self.mode != "w" or not self._closed:
+                self.stream = self._open()
+        if not self.stream:
+            return
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= self.flush_level:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class SizeTrackingRotatingFileHandler(RotatingFileHandler):
+    """
+    A rotating file handler that keeps track of the log file size in memory instead of seeking to the end of the file for every record.
+    Each record is also formatted only once, whereas RotatingFileHandler formats it both to check the size and to write it.
+    With `rotate_in_background`, a rollover only renames the current file and reopens a new one; shifting the backups
+    (and any custom `rotator`) runs on a shared single worker thread, so logging calls do not wait for it.
+    """
+
+    # A single worker keeps the rotations of all the handlers in submission order
+    _rotation_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-rotation")
+
+    def __init__(
+        self,
+        filename: str | Path,
+        mode: str = "a",
+        maxBytes: int = 0,
+        backupCount: int = 0,
+        encoding: None | str = None,
+        delay: bool = False,
+        errors: None | str = None,
+        rotate_in_background: bool = False,
+    ):
+        super().__init__(filename=filename, mode=mode, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding, delay=delay, errors=errors)
+        self.rotate_in_background = rotate_in_background
+        # The size is tracked in bytes, so records are measured with the encoding of the file
+        self._size_encoding: str = locale.getpreferredencoding(False) if self.encoding in (None, "locale") else self.encoding
+        self._size: int = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+        self._rotation_ids = itertools.count()
+        self._rotations: list[Future] = []
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        """Always False: emit checks the size of the formatted record itself, and formatting the record again would indent its message twice."""
+        return False
+
+    def doRollover(self) -> None:
+        if not self.rotate_in_background or self.backupCount <= 0:
+            super().doRollover()
+            self._size = 0
+            return
+
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename):
+            pending = f"{self.baseFilename}.rotating.{os.getpid()}.{next(self._rotation_ids)}"
+            os.replace(self.baseFilename, pending)
+            self._rotations = [rotation for rotation in self._rotations if not rotation.done()]
+            try:
+                self._rotations.append(self._rotation_executor.submit(self._shift_backups, pending))
+            except RuntimeError:
+                # The executor no longer accepts work at interpreter exit, so shift the backups on this thread
+                self._shift_backups(pending)
+        if not self.delay:
+            self.stream = self._open()
+        self._size = 0
+
+    def close(self) -> None:
+        """Wait for the pending background rotations and close the file."""
+        with self.lock:
+            rotations, self._rotations = self._rotations, []
+        for rotation in rotations:
+            if rotation.exception() is not None and logging.raiseExceptions:
+                sys.stderr.write(f"--- Logging error in {self.__class__.__name__} rotation ---\n")
+                traceback.print_exception(rotation.exception(), file=sys.stderr)
+        super().close()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            msg = self.format(record) + self.terminator
+            length = self._encoded_length(msg)
+            if self._exceeds_max_bytes(length):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(msg)
+            self.flush()
+            self._size += length
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def _shift_backups(self, pending: str) -> None:
+        # Same renaming scheme as RotatingFileHandler.doRollover, with the renamed log file as the source
+        for i in range(self.backupCount - 1, 0, -1):
+            source = self.rotation_filename(f"{self.baseFilename}.{i}")
+            destination = self.rotation_filename(f"{self.baseFilename}.{i + 1}")
+            if os.path.exists(source):
+                if os.path.exists(destination):
+                    os.remove(destination)
+                os.rename(source, destination)
+        destination = self.rotation_filename(f"{self.baseFilename}.1")
+        if os.path.exists(destination):
+            os.remove(destination)
+        self.rotate(pending, destination)
+
+    def _encoded_length(self, msg: str) -> int:
+        # Number of bytes the text stream writes for the message, including the newline translation on Windows
+        length = len(msg.encode(self._size_encoding, self.errors or "strict"))
+        if os.linesep != "\n":
+            length += msg.count("\n") * (len(os.linesep) - 1)
+        return length
+
+    def _exceeds_max_bytes(self, length: int) -> bool:
+        # Like RotatingFileHandler, never roll over an empty file
+        return self.maxBytes > 0 and self._size > 0 and self._size + length >= self.maxBytes
@@ -1,13 +1,53 @@
+import atexit
 import logging
 import os
-from datetime import datetime
-from logging.handlers import RotatingFileHandler
+import queue
+import re
+import weakref
+from datetime import date
+from functools import lru_cache
+from logging.handlers import QueueListener
 from pathlib import Path
 
 try:
     from .formatters import ColoredIndentedMessageFormatter, IndentedMessageFormatter
+    from .handlers import AppendFileHandler, BatchedFileHandler, BufferedFileHandler, InProcessQueueHandler, MmapFileHandler, SizeTrackingRotatingFileHandler
 except ImportError:
     from formatters import ColoredIndentedMessageFormatter, IndentedMessageFormatter
+    from handlers import AppendFileHandler, BatchedFileHandler, BufferedFileHandler, InProcessQueueHandler, MmapFileHandler, SizeTrackingRotatingFileHandler
+
+
+# Characters not allowed in Windows path components, including the null byte ('/' and '\\' are path separators)
+_WIN_INVALID_CHARS_RE = re.compile(r'[\0<>:"|?*]')
+
+# Reserved Windows device names
+_WIN_RESERVED_NAMES: frozenset[str] = frozenset({"CON", "PRN", "AUX", "NUL", *(f"COM{i}" for i in range(1, 10)), *(f"LPT{i}" for i in range(1, 10))})
+
+
+# Queue handlers whose listener is running; a single atexit hook stops them so the queued records are written
+_queue_handlers: weakref.WeakSet = weakref.WeakSet()
+
+
+@atexit.register
+def _stop_queue_listeners() -> None:
+    """Stop the listeners of the queue handlers that are still running."""
+    for handler in list(_queue_handlers):
+        TidyLogger._stop_queue_listener(handler)
+
+
+def disable_process_info() -> None:
+    """
+    Stop log records from collecting the thread, process, multiprocessing, and asyncio task information, which the default formats do not use.
+    This saves a few system calls per record, but it sets the global flags of the logging module and so affects every logger in the process;
+    set `logging.logThreads`, `logging.logProcesses`, `logging.logMultiprocessing`, and `logging.logAsyncioTasks` back to True to restore them.
+    """
+    logging.logThreads = logging.logProcesses = logging.logMultiprocessing = logging.logAsyncioTasks = False
+
+
+@lru_cache(maxsize=4)
+def _date_suffix(ordinal: int) -> str:
+    """Return the 'YYYYMMDD' date suffix for a proleptic Gregorian ordinal (cached per day)."""
+    return date.fromordinal(ordinal).strftime("%Y%m%d")
 
 
 class TidyLogger:
@@ -15,6 +55,23 @@ class TidyLogger:
     DEFAULT_FILE_NAME: str = "log"
     DEFAULT_FILE_EXTENSION: str = ".log"
 
+    # The formatters are stateless, so a single instance is shared by all the loggers
+    _file_formatter: IndentedMessageFormatter = IndentedMessageFormatter()
+    _console_formatter: ColoredIndentedMessageFormatter = ColoredIndentedMessageFormatter()
+
+    # File handler classes selected by the `file_writer` argument
+    _file_writers: dict[str, type[logging.Handler]] = {
+        "default": logging.FileHandler,
+        "batched": BatchedFileHandler,
+        "buffered": BufferedFileHandler,
+        "append": AppendFileHandler,
+        "mmap": MmapFileHandler,
+    }
+
+    # Precomputed default log file paths; the dated one is rebuilt when the date changes (ordinal 0 means not built yet)
+    _default_file_path: Path = Path(f"{DEFAULT_FILE_NAME}{DEFAULT_FILE_EXTENSION}")
+    _default_dated_file_path: tuple[int, Path] = (0, _default_file_path)
+
     def __init__(
         self,
         file_name: None | str | Path = None,
@@ -26,6 +83,8 @@ class TidyLogger:
         use_file_rotation: bool = False,
         max_bytes: int = 100 * 1024 * 1024,
         backup_count: int = 10,
+        file_writer: str = "default",
+        async_io: bool = False,
     ):
         """
         Initialize the TidyLogger.
@@ -35,116 +94,188 @@ class TidyLogger:
         :param file_level: Logging level for file output. Default is DEBUG.
         :param name: Name of the logger. If None, the class name is used.
         :param add_date_suffix_to_file_name: Whether to append the current date to the log file name.
-        :param use_file_rotation: Whether to use rotating file handler.
+        :param use_file_rotation: Whether to use rotating file handler. The backups are renamed on a background thread.
         :param max_bytes: Maximum size in bytes for the log file before rotation (only if use_file_rotation is True).
         :param backup_count: Number of backup files to keep (only if use_file_rotation is True).
+        :param file_writer: How the log file is written (only if use_file_rotation is False):
+            'default': a standard file handler that flushes after every record;
+            'batched': from a background thread that formats pending records and writes them with a single write call;
+            'buffered': through a 1 MiB buffer, flushed on WARNING and higher records and on close;
+            'append': with a single os.write call per record on a file descriptor opened for appending;
+            'mmap': by copying the records into a memory mapping of the log file (Linux only, single process).
+        :param async_io: Whether to format and write the records on a background thread, so logging calls only enqueue the record.
+        :raises ValueError: If file_writer is unknown, or if it is not 'default' while use_file_rotation is True.
+        :raises OSError: If file_writer is 'mmap' and the platform is not Linux.
         """
+        if file_writer not in self._file_writers:
+            raise ValueError(f"`file_writer` should be one of {', '.join(repr(writer) for writer in self._file_writers)}.")
+        if use_file_rotation and file_writer != "default":
+            raise ValueError("`file_writer` cannot be used together with `use_file_rotation`.")
+
         self.logger = logging.getLogger(self.__class__.__name__ if name is None else name)
         self.logger.setLevel(min(console_level, file_level))
 
-        file_formatter = IndentedMessageFormatter()
-        console_formatter = ColoredIndentedMessageFormatter()
-
         # Avoid adding handlers if they already exist (prevents duplicate logs)
-        if not self.logger.handlers:
+        if self.logger.handlers:
+            return
 
-            # File handler
-            file_path: Path = self._create_file_path(file_name, add_date_suffix_to_file_name=add_date_suffix_to_file_name)
+        # File handler
+        file_path: Path = self._create_file_path(file_name, add_date_suffix_to_file_name=add_date_suffix_to_file_name)
 
-            file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
 
-            if use_file_rotation:
-                file_handler = RotatingFileHandler(filename=file_path, mode=file_mode, maxBytes=max_bytes, backupCount=backup_count)
-            else:
-                file_handler = logging.FileHandler(filename=file_path, mode=file_mode)
+        if use_file_rotation:
+            file_handler = SizeTrackingRotatingFileHandler(filename=file_path, mode=file_mode, maxBytes=max_bytes, backupCount=backup_count, rotate_in_background=True)
+        else:
+            file_handler = self._file_writers[file_writer](filename=file_path, mode=file_mode)
 
-            file_handler.setFormatter(file_formatter)
-            file_handler.setLevel(file_level)
-            self.logger.addHandler(file_handler)
+        file_handler.setFormatter(self._file_formatter)
+        file_handler.setLevel(file_level)
 
-            # Console handler
-            console_handler = logging.StreamHandler()
-            console_handler.setFormatter(console_formatter)
-            console_handler.setLevel(console_level)
+        # Console handler
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(self._console_formatter)
+        console_handler.setLevel(console_level)
+
+        if async_io:
+            # The listener thread dispatches the queued records to the file and console handlers
+            queue_handler = InProcessQueueHandler(queue.SimpleQueue())
+            queue_handler.listener = QueueListener(queue_handler.queue, file_handler, console_handler, respect_handler_level=True)
+            queue_handler.listener.start()
+            _queue_handlers.add(queue_handler)
+            self.logger.addHandler(queue_handler)
+        else:
+            self.logger.addHandler(file_handler)
             self.logger.addHandler(console_handler)
 
+    # The level checks only save work for disabled levels; for enabled levels the logger checks the level again
     def debug(self, message: str, *args, **kwargs) -> None:
         """Log a debug message."""
-        self.logger.debug(message, *args, **kwargs)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(message, *args, **kwargs)
 
     def info(self, message: str, *args, **kwargs) -> None:
         """Log an info message."""
-        self.logger.info(message, *args, **kwargs)
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(message, *args, **kwargs)
 
     def warning(self, message: str, *args, **kwargs) -> None:
         """Log a warning message."""
-        self.logger.warning(message, *args, **kwargs)
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.logger.warning(message, *args, **kwargs)
 
     def error(self, message: str, *args, **kwargs) -> None:
         """Log an error message."""
-        self.logger.error(message, *args, **kwargs)
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.logger.error(message, *args, **kwargs)
 
     def critical(self, message: str, *args, **kwargs) -> None:
         """Log a critical message."""
-        self.logger.critical(message, *args, **kwargs)
+        if self.logger.isEnabledFor(logging.CRITICAL):
+            self.logger.critical(message, *args, **kwargs)
 
     def close(self) -> None:
         """Close all handlers associated with the logger."""
         for handler in list(self.logger.handlers):
-            try:
-                handler.flush()
-            except Exception:
-                pass
-            try:
-                handler.close()
-            except Exception:
-                pass
+            for listener_handler in self._stop_queue_listener(handler):
+                self._close_handler(listener_handler)
+            self._close_handler(handler)
             self.logger.removeHandler(handler)
 
+    @staticmethod
+    def _close_handler(handler: logging.Handler) -> None:
+        """Flush and close a handler, ignoring any errors."""
+        try:
+            handler.flush()
+        except Exception:
+            pass
+        try:
+            handler.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _stop_queue_listener(handler: logging.Handler) -> tuple[logging.Handler, ...]:
+        """
+        Stop the queue listener attached to a queue handler, after it has processed all the queued records.
+        :param handler: The handler attached to the logger.
+        :return: The handlers of the stopped listener, or an empty tuple if there was no running listener.
+        """
+        listener: None | QueueListener = getattr(handler, "listener", None)
+        if listener is None:
+            return ()
+        handler.listener = None
+        _queue_handlers.discard(handler)
+        listener.stop()
+        return listener.handlers
+
     @staticmethod
     def _create_file_path(file_name: None | str | Path, add_date_suffix_to_file_name: bool = True) -> Path:
         """
         Validate and normalize a log file path.
-        Adds '.log' extension if missing.
+        Adds '.log' extension if missing. Results are cached for the current day.
         :param file_name: The input file name.
         :param add_date_suffix_to_file_name: Whether to append the current date to the log file name.
         :return: A Path object representing the validated log file path.
         :raises ValueError: If the file name is not null and empty, and if it is invalid.
         """
 
-        date_suffix: str = datetime.now().strftime("%Y%m%d")
-
-        if file_name is None and add_date_suffix_to_file_name:
-            return Path("{}_{}{}".format(TidyLogger.DEFAULT_FILE_NAME, date_suffix, TidyLogger.DEFAULT_FILE_EXTENSION))
+        if file_name is None and not add_date_suffix_to_file_name:
+            return TidyLogger._default_file_path
         elif file_name is None:
-            return Path("{}{}".format(TidyLogger.DEFAULT_FILE_NAME, TidyLogger.DEFAULT_FILE_EXTENSION))
+            today: int = date.today().toordinal()
+            day_ordinal, file_path = TidyLogger._default_dated_file_path
+            if day_ordinal != today:
+                file_path = Path(f"{TidyLogger.DEFAULT_FILE_NAME}_{_date_suffix(today)}{TidyLogger.DEFAULT_FILE_EXTENSION}")
+                TidyLogger._default_dated_file_path = (today, file_path)
+            return file_path
+
+        if not isinstance(file_name, (str, Path)):
+            raise ValueError("'file_name' should be of type 'str', 'Path', or 'None'.")
 
-        if isinstance(file_name, (str, Path)):
-            p = Path(file_name)
-            s = str(p)
+        return TidyLogger._create_file_path_for_day(file_name, add_date_suffix_to_file_name, date.today().toordinal())
 
-            if not s.strip():
-                raise ValueError("`file_name` cannot be empty.")
-            if "\0" in s:
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _create_file_path_for_day(file_name: str | Path, add_date_suffix_to_file_name: bool, day_ordinal: int) -> Path:
+        """
+        Cached implementation of `_create_file_path` for non-null file names; the day ordinal is part of the cache key so the date suffix stays current.
+        :param file_name: The input file name.
+        :param add_date_suffix_to_file_name: Whether to append the current date to the log file name.
+        :param day_ordinal: Proleptic Gregorian ordinal of the current date.
+        :return: A Path object representing the validated log file path.
+        :raises ValueError: If the file name is empty or invalid.
+        """
+
+        s = os.fspath(file_name)
+
+        if not s.strip():
+            raise ValueError("`file_name` cannot be empty.")
+
+        if os.name == "nt":
+            # Check for the null byte and the invalid characters in a single scan
+            invalid_char = _WIN_INVALID_CHARS_RE.search(s)
+            if invalid_char is not None and invalid_char.group() == "\0":
                 raise ValueError("`file_name` contains null byte.")
+            if invalid_char is not None:
+                raise ValueError("`file_name` contains invalid characters for Windows paths.")
+            if not _WIN_RESERVED_NAMES.isdisjoint(part.partition(".")[0].upper() for part in s.replace("\\", "/").split("/")):
+                raise ValueError("`file_name` path contains reserved Windows device name component.")
+        elif "\0" in s:
+            raise ValueError("`file_name` contains null byte.")
+
+        s = s.rstrip("/\\" if os.name == "nt" else "/")
+        if os.path.basename(s) in ("", ".", ".."):
+            raise ValueError("`file_name` does not contain a file name.")
+
+        # Build the final path string in one step and construct a single Path from it
+        root, suffix = os.path.splitext(s)
+        if suffix == ".":
+            # Like pathlib, a trailing dot is part of the stem rather than an empty extension
+            root, suffix = s, ""
+        if add_date_suffix_to_file_name:
+            s = f"{root}_{_date_suffix(day_ordinal)}{suffix or TidyLogger.DEFAULT_FILE_EXTENSION}"
+        elif not suffix:
+            s = f"{s}{TidyLogger.DEFAULT_FILE_EXTENSION}"
 
-            if os.name == "nt":
-                invalid_chars = set(r'<>:"/\\|?*')
-                if any(ch in s for ch in invalid_chars):
-                    raise ValueError("`file_name` contains invalid characters for Windows paths.")
-                reserved = {"CON", "PRN", "AUX", "NUL"} | {f"COM{i}" for i in range(1, 10)} | {f"LPT{i}" for i in range(1, 10)}
-                for part in p.parts:
-                    if Path(part).stem.upper() in reserved:
-                        raise ValueError("`file_name` path contains reserved Windows device name component.")
-
-            if add_date_suffix_to_file_name:
-                suffix = p.suffix if p.suffix else TidyLogger.DEFAULT_FILE_EXTENSION
-                new_name = f"{p.stem}_{date_suffix}{suffix}"
-                p = p.with_name(new_name)
-            else:
-                if p.suffix == "":
-                    p = p.with_suffix(TidyLogger.DEFAULT_FILE_EXTENSION)
-
-            return p
-
-        raise ValueError("'file_name' should be of type 'str', 'Path', or 'None'.")
+        return Path(s)
@@ -1,6 +1,10 @@
 import logging
 import os
+import re
+import stat
+import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -8,7 +12,8 @@ import pytest
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
-from tidy_logger import TidyLogger  # noqa: E402
+from handlers import BufferedFileHandler, MmapFileHandler, SizeTrackingRotatingFileHandler  # noqa: E402
+from tidy_logger import TidyLogger, _queue_handlers, disable_process_info  # noqa: E402
 
 
 def test_create_file_path():
@@ -94,6 +99,21 @@ def test_create_file_path():
 
     assert file_path.parent == Path("parent_dir"), "File name with parent directory and extension: the parent directory must be the same as specified."
 
+    # File name with a trailing dot
+    file_path = TidyLogger._create_file_path("test_log.")
+
+    assert file_path.name == "test_log._{}{}".format(date_suffix, TidyLogger.DEFAULT_FILE_EXTENSION), "File name with a trailing dot: the dot must be kept in the stem."
+
+    # File name with a trailing dot and no date suffix
+    file_path = TidyLogger._create_file_path("test_log.", add_date_suffix_to_file_name=False)
+
+    assert file_path.name == "test_log.{}".format(TidyLogger.DEFAULT_FILE_EXTENSION), "File name with a trailing dot and no date suffix: the default extension must be added."
+
+    # Paths without a file name
+    for file_name_without_name in (".", "..", "/", "parent_dir/.."):
+        with pytest.raises(ValueError):
+            TidyLogger._create_file_path(file_name_without_name)
+
     # Invalid characters and reserved names on Windows
     if os.name == "nt":
 
@@ -114,8 +134,9 @@ def test_log_file_creation():
     file_path: Path = TidyLogger._create_file_path(None)
     TidyLogger(file_name=None).close()
 
-    assert file_path.is_file(), "File name is None: the log path is not a file."
-    assert file_path.exists(), "File name is None: the log file has not been created."
+    exists, is_file = stat_file(file_path)
+    assert exists, "File name is None: the log file has not been created."
+    assert is_file, "File name is None: the log path is not a file."
     remove_log_files_and_empty_directories(file_path)
 
     # A single file name
@@ -123,8 +144,9 @@ def test_log_file_creation():
     file_path: Path = TidyLogger._create_file_path(file_name)
     TidyLogger(file_name=file_name).close()
 
-    assert file_path.is_file(), "A single name: the log path is not a file."
-    assert file_path.exists(), "A single name: the log file has not been created."
+    exists, is_file = stat_file(file_path)
+    assert exists, "A single name: the log file has not been created."
+    assert is_file, "A single name: the log path is not a file."
     remove_log_files_and_empty_directories(file_path)
 
     # A file name with parent directory
@@ -132,8 +154,9 @@ def test_log_file_creation():
     file_path: Path = TidyLogger._create_file_path(file_name)
     TidyLogger(file_name=file_name).close()
 
-    assert file_path.is_file(), "A file name with parent directory: the log path is not a file."
-    assert file_path.exists(), "A file name with parent directory: the log file has not been created."
+    exists, is_file = stat_file(file_path)
+    assert exists, "A file name with parent directory: the log file has not been created."
+    assert is_file, "A file name with parent directory: the log path is not a file."
     remove_log_files_and_empty_directories(file_path)
 
     # A file name with multiple parent directories
@@ -141,21 +164,267 @@ def test_log_file_creation():
     file_path: Path = TidyLogger._create_file_path(file_name)
     TidyLogger(file_name=file_name).close()
 
-    assert file_path.is_file(), "A file name with multiple parent directories: the log path is not a file."
-    assert file_path.exists(), "A file name with multiple parent directories: the log file has not been created."
+    exists, is_file = stat_file(file_path)
+    assert exists, "A file name with multiple parent directories: the log file has not been created."
+    assert is_file, "A file name with multiple parent directories: the log path is not a file."
+    remove_log_files_and_empty_directories(file_path)
+
+
+def test_batched_file_writes():
+
+    file_name: str = "test_dir/test_batched_log"
+    file_path: Path = TidyLogger._create_file_path(file_name)
+    logger = TidyLogger(file_name=file_name, name="test_batched_file_writes", console_level=logging.CRITICAL, file_writer="batched")
+    for i in range(1000):
+        logger.info("message %d", i)
+    logger.close()
+
+    content: str = file_path.read_text(encoding="utf-8")
+    remove_log_files_and_empty_directories(file_path)
+
+    assert content.count("message ") == 1000, "Batched file writes: all the records must be written to the log file."
+    assert "message 999\n" in content, "Batched file writes: the message arguments must be merged into the records."
+    assert content.index("message 0\n") < content.index("message 999\n"), "Batched file writes: the records must be written in order."
+
+    with pytest.raises(ValueError):
+        TidyLogger(name="test_batched_file_writes", use_file_rotation=True, file_writer="batched")
+    with pytest.raises(ValueError):
+        TidyLogger(name="test_batched_file_writes", file_writer="unknown")
+
+
+def test_buffered_file_writes():
+
+    file_name: str = "test_dir/test_buffered_log"
+    file_path: Path = TidyLogger._create_file_path(file_name)
+    logger = TidyLogger(file_name=file_name, name="test_buffered_file_writes", console_level=logging.CRITICAL, file_writer="buffered")
+
+    logger.info("buffered message")
+    assert file_path.stat().st_size == 0, "Buffered file writes: records below the flush level must stay in the buffer."
+
+    logger.warning("flushed message")
+    content: str = file_path.read_text()
+    assert "buffered message" in content and "flushed message" in content, "Buffered file writes: a warning must flush the buffer."
+
+    logger.info("closing message")
+    logger.close()
+    content: str = file_path.read_text()
+
+    assert "closing message" in content, "Buffered file writes: closing the logger must flush the buffer."
+
+    # A record emitted after closing a handler opened in 'w' mode must not truncate the log file
+    handler = BufferedFileHandler(file_path, mode="w")
+    handler.emit(logging.makeLogRecord({"msg": "first message"}))
+    handler.close()
+    handler.emit(logging.makeLogRecord({"msg": "late message"}))
+    handler.close()
+    content: str = file_path.read_text()
+    remove_log_files_and_empty_directories(file_path)
+
+    assert "first message" in content and "late message" not in content, "Buffered file writes: a closed handler in 'w' mode must not reopen the log file."
+
+
+def test_background_rotation(monkeypatch):
+
+    file_name: str = "test_dir/test_background_rotation_log"
+    file_path: Path = TidyLogger._create_file_path(file_name)
+    backup_paths: list[Path] = [file_path.with_name(f"{file_path.name}.{i}") for i in range(1, 5)]
+
+    # Many quick rollovers are queued on the background worker; an executor that is shut down (as at interpreter exit) rotates synchronously
+    shut_down_executor = ThreadPoolExecutor(max_workers=1)
+    shut_down_executor.shutdown()
+    for executor in (SizeTrackingRotatingFileHandler._rotation_executor, shut_down_executor):
+        monkeypatch.setattr(SizeTrackingRotatingFileHandler, "_rotation_executor", executor)
+        logger = TidyLogger(file_name=file_name, name="test_background_rotation", console_level=logging.CRITICAL, use_file_rotation=True, max_bytes=256, backup_count=3)
+        for i in range(200):
+            logger.info(f"message {i}")
+        logger.close()
+
+        pending_paths: list[Path] = list(file_path.parent.glob(f"{file_path.name}.rotating.*"))
+        existing_backups: list[Path] = [path for path in backup_paths if path.exists()]
+        current_numbers: list[int] = [int(n) for n in re.findall(r"message (\d+)", file_path.read_text())]
+        backup_numbers: list[int] = [int(n) for n in re.findall(r"message (\d+)", file_path.with_name(f"{file_path.name}.1").read_text())]
+        for path in [*backup_paths, *pending_paths]:
+            remove_log_files_and_empty_directories(path)
+        remove_log_files_and_empty_directories(file_path)
+
+        assert pending_paths == [], "Background rotation: no renamed log file may be left after closing the logger."
+        assert len(existing_backups) == 3, "Background rotation: exactly 'backup_count' backups must exist."
+        assert current_numbers[-1] == 199, "Background rotation: the current log file must hold the latest record."
+        assert backup_numbers[-1] + 1 == current_numbers[0], "Background rotation: the first backup must hold the records right before the current file."
+
+
+def test_direct_file_writes():
+
+    file_name: str = "test_dir/test_direct_log"
+    file_path: Path = TidyLogger._create_file_path(file_name)
+    logger = TidyLogger(file_name=file_name, name="test_direct_file_writes", console_level=logging.CRITICAL, file_writer="append")
+
+    logger.info("first message")
+    content: str = file_path.read_text(encoding="utf-8")
+    assert "first message" in content, "Direct file writes: the record must be in the file as soon as it is logged."
+
+    logger.close()
+    logger = TidyLogger(file_name=file_name, name="test_direct_file_writes", console_level=logging.CRITICAL, file_writer="append")
+    logger.info("second message")
+    logger.close()
+
+    content: str = file_path.read_text(encoding="utf-8")
+    remove_log_files_and_empty_directories(file_path)
+
+    assert "first message" in content and "second message" in content, "Direct file writes: reopening the log file must append to it."
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Memory mapped log files are only supported on Linux.")
+def test_mmap_file_writes():
+
+    file_name: str = "test_dir/test_mmap_log"
+    file_path: Path = TidyLogger._create_file_path(file_name)
+    logger = TidyLogger(file_name=file_name, name="test_mmap_file_writes", console_level=logging.CRITICAL, file_writer="mmap")
+    # Write more than the initial 16 MiB mapping to exercise growing the file
+    message: str = "x" * 4096
+    for i in range(5000):
+        logger.info(f"{i} {message}")
+    logger.close()
+
+    content: str = file_path.read_text(encoding="utf-8")
+    remove_log_files_and_empty_directories(file_path)
+
+    assert content.count(message) == 5000, "Mmap file writes: all the records must be written to the log file."
+    assert "\0" not in content, "Mmap file writes: the log file must be truncated to the written size when closed."
+
+    # A process that exits without closing the handler leaves zero padding, which must be removed when the file is reopened
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    crash_script: str = (
+        "import logging, os, sys; sys.path.insert(0, sys.argv[1]); from handlers import MmapFileHandler; "
+        "handler = MmapFileHandler(sys.argv[2], chunk_size=1 << 20); handler.emit(logging.makeLogRecord({'msg': 'run1'})); os._exit(0)"
+    )
+    subprocess.run([sys.executable, "-c", crash_script, str(Path(__file__).resolve().parents[1] / "src"), str(file_path)], check=True)
+    handler = MmapFileHandler(file_path, chunk_size=1 << 20)
+    handler.emit(logging.makeLogRecord({"msg": "run2"}))
+    handler.close()
+    content: str = file_path.read_text(encoding="utf-8")
+    remove_log_files_and_empty_directories(file_path)
+
+    assert content == "run1\nrun2\n", "Mmap file writes: reopening the log file after a crash must append right after the last record."
+
+    # A file that cannot be mapped must not leak the file descriptor
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    os.mkfifo(file_path)
+    open_fds: int = len(os.listdir("/proc/self/fd"))
+    with pytest.raises(OSError):
+        MmapFileHandler(file_path)
+    remaining_fds: int = len(os.listdir("/proc/self/fd"))
+    file_path.unlink()
+    remove_log_files_and_empty_directories(file_path)
+
+    assert remaining_fds == open_fds, "Mmap file writes: the file descriptor must be closed when the handler cannot be created."
+
+
+def test_async_io():
+
+    file_name: str = "test_dir/test_async_log"
+    file_path: Path = TidyLogger._create_file_path(file_name)
+    logger = TidyLogger(file_name=file_name, name="test_async_io", console_level=logging.CRITICAL, async_io=True)
+    for i in range(100):
+        logger.debug(f"message {i}")
+    logger.close()
+
+    content: str = file_path.read_text()
+    remove_log_files_and_empty_directories(file_path)
+
+    assert content.count("message ") == 100, "Async IO: all the queued records must be written once the logger is closed."
+    assert not logger.logger.handlers, "Async IO: closing the logger must remove the queue handler."
+
+    for _ in range(3):
+        TidyLogger(file_name=file_name, name="test_async_io", console_level=logging.CRITICAL, async_io=True).close()
+    remove_log_files_and_empty_directories(file_path)
+
+    assert len(_queue_handlers) == 0, "Async IO: closing the logger must release its queue handler for the exit hook."
+
+    # Exceptions must be laid out as in the synchronous log (traceback after the indented message, not indented itself)
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError as exception:
+        error: RuntimeError = exception
+    contents: list[str] = []
+    for async_io in (False, True):
+        logger = TidyLogger(file_name=file_name, file_mode="w", name="test_async_io", console_level=logging.CRITICAL, async_io=async_io)
+        logger.error("failure", exc_info=error)
+        logger.close()
+        contents.append(file_path.read_text())
     remove_log_files_and_empty_directories(file_path)
 
+    assert "\nTraceback (most recent call last):" in contents[1], "Async IO: the traceback must not be indented as part of the message."
+    assert contents[0].splitlines()[1:] == contents[1].splitlines()[1:], "Async IO: the record must be laid out as in the synchronous log."
+
+
+def test_file_rotation():
+
+    file_name: str = "test_dir/test_rotating_log"
+    file_path: Path = TidyLogger._create_file_path(file_name)
+    logger = TidyLogger(file_name=file_name, name="test_file_rotation", console_level=logging.CRITICAL, use_file_rotation=True, max_bytes=1024, backup_count=2)
+    for i in range(100):
+        logger.info(f"message {i}")
+    logger.close()
+
+    backup_paths: list[Path] = [file_path.with_name(f"{file_path.name}.{i}") for i in range(1, 4)]
+    sizes: list[int] = [path.stat().st_size for path in [file_path, *backup_paths] if path.exists()]
+    content: str = file_path.read_text()
+    for path in backup_paths:
+        remove_log_files_and_empty_directories(path)
+    remove_log_files_and_empty_directories(file_path)
+
+    assert len(sizes) == 3, "File rotation: the log file and exactly 'backup_count' backups must exist."
+    assert all(size <= 1024 for size in sizes), "File rotation: no log file may exceed 'max_bytes'."
+    assert "message 99" in content, "File rotation: the latest record must be in the current log file."
+
+    # Multibyte messages: the size limit applies to the encoded bytes
+    logger = TidyLogger(file_name=file_name, name="test_file_rotation", console_level=logging.CRITICAL, use_file_rotation=True, max_bytes=1024, backup_count=2)
+    for i in range(200):
+        logger.info(f"日本語のメッセージ {i}")
+    logger.close()
+
+    sizes: list[int] = [path.stat().st_size for path in [file_path, *backup_paths] if path.exists()]
+    for path in backup_paths:
+        remove_log_files_and_empty_directories(path)
+    remove_log_files_and_empty_directories(file_path)
+
+    assert all(size <= 1024 for size in sizes), "File rotation: no log file may exceed 'max_bytes' with multibyte messages."
+
+
+def test_disable_process_info(monkeypatch):
+
+    # Restore the global flags of the logging module after the test
+    for flag in ("logThreads", "logProcesses", "logMultiprocessing", "logAsyncioTasks"):
+        monkeypatch.setattr(logging, flag, True, raising=False)
+
+    disable_process_info()
+    record = logging.getLogger("test_disable_process_info").makeRecord("test_disable_process_info", logging.INFO, __file__, 0, "message", None, None)
+
+    assert record.thread is None, "Disable process info: the thread information must not be collected."
+    assert record.process is None, "Disable process info: the process information must not be collected."
+
+
+def stat_file(file_path: Path) -> tuple[bool, bool]:
+    # Check whether the path exists and is a regular file with a single stat call
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return False, False
+    return True, stat.S_ISREG(st.st_mode)
+
 
 def remove_log_files_and_empty_directories(file_path: Path) -> None:
     # Remove the log file
-    if file_path.is_file():
+    if stat_file(file_path)[1]:
         file_path.unlink()
 
-    # Remove empty parent directories
-    parent_directory: Path = file_path.parent
-    while parent_directory != Path(".") or parent_directory != Path.cwd():
+    # Remove empty parent directories, up to the current directory
+    stop_directories: tuple[Path, Path] = (Path("."), Path.cwd())
+    for parent_directory in file_path.parents:
+        if parent_directory in stop_directories:
+            break
         try:
             parent_directory.rmdir()
         except OSError:
             break
-        parent_directory = parent_directory.parent